@@ -0,0 +1,67 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Optional compiled implementation of the sound entry decoding loop of the BAS format. The pure Python implementation in
+the bas module is used when this extension is not built. Each entry is laid out as ">I3fI6B6x" or "<I3fI6B6x",
+depending on the endianness of the data.
+"""
+
+from libc.stdint cimport uint8_t, uint32_t
+from libc.string cimport memcpy
+
+
+cdef inline uint32_t _read_u32_(const uint8_t* p, bint is_big_endian) noexcept nogil:
+    if is_big_endian:
+        return (<uint32_t>p[0] << 24) | (<uint32_t>p[1] << 16) | (<uint32_t>p[2] << 8) | <uint32_t>p[3]
+    return (<uint32_t>p[3] << 24) | (<uint32_t>p[2] << 16) | (<uint32_t>p[1] << 8) | <uint32_t>p[0]
+
+
+cdef inline float _read_f32_(const uint8_t* p, bint is_big_endian) noexcept nogil:
+    cdef uint32_t bits = _read_u32_(p, is_big_endian)
+    cdef float val
+    memcpy(&val, &bits, 4)
+    return val
+
+
+def decode_entries(const uint8_t[::1] data, Py_ssize_t off, Py_ssize_t num_entries, reverse, bint is_big_endian,
+                   type sound_type) -> list:
+    """
+    Decodes the given number of sound entries from the specified buffer. The sound entries are created without calling
+    their constructor since all of their fields are set here.
+
+    :param data: the buffer.
+    :param off: the offset of the first sound entry into the buffer.
+    :param num_entries: the number of sound entries to decode.
+    :param reverse: the mapping of sound IDs to sound label names.
+    :param is_big_endian: the endianness of the data.
+    :param sound_type: the class to create the sound entries with.
+    :return: the list of decoded sound entries.
+    :raises ValueError: when the buffer is too small to hold all entries.
+    :raises KeyError: when no sound label name could be found for a sound ID.
+    """
+    cdef list sounds
+    cdef const uint8_t* p
+    cdef Py_ssize_t i
+
+    if off < 0 or num_entries < 0 or (data.shape[0] - off) // 32 < num_entries:
+        raise ValueError(f"Buffer of {data.shape[0]} bytes cannot hold {num_entries} sound entries at offset {off}")
+
+    new_sound = sound_type.__new__
+    sounds = [None] * num_entries
+
+    for i in range(num_entries):
+        p = &data[off + i * 32]
+        sound = new_sound(sound_type)
+        sound.sound = reverse[_read_u32_(p, is_big_endian)]
+        sound.start_frame = _read_f32_(p + 4, is_big_endian)
+        sound.unk8 = _read_f32_(p + 8, is_big_endian)
+        sound.pitch = _read_f32_(p + 12, is_big_endian)
+        sound.flags = _read_u32_(p + 16, is_big_endian)
+        sound.volume = p[20]
+        sound.pitch_factor = p[21]
+        sound.unk16 = p[22]
+        sound.pan = p[23]
+        sound.volume_factor = p[24]
+        sound.unk19 = p[25]
+        sounds[i] = sound
+
+    return sounds
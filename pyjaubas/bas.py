@@ -9,9 +9,42 @@ __all__ = [
     "JAUSoundAnimation", "from_buffer", "pack_buffer", "from_file", "write_file", "from_json", "dump_json"
 ]
 
+import contextlib
+import functools
 import json
+import mmap
+import operator
 import os
 import struct
+import types
+
+try:
+    from . import _bas_fast
+except ImportError:
+    _bas_fast = None
+
+
+# Structures for parsing and packing the header and sound entries
+_HDR_BE = struct.Struct(">H2B4x")  # Big-endian
+_HDR_LE = struct.Struct("<H2B4x")  # Little-endian
+_ENTRY_BE = struct.Struct(">I3fI6B6x")  # Big-endian
+_ENTRY_LE = struct.Struct("<I3fI6B6x")  # Little-endian
+
+
+@contextlib.contextmanager
+def _byte_view_(data, off: int):
+    """
+    Provides a byte view of the given buffer along with the offset into it. The view is cast to bytes so that offsets
+    are byte offsets regardless of the buffer's item format. Negative offsets count from the end of the buffer, just
+    like they do for unpack_from and pack_into. The view is released on exit, so memory-mapped input can still be
+    closed if an error occurs.
+
+    :param data: the buffer.
+    :param off: the offset into the buffer.
+    :return: the byte view and the non-negative offset into it.
+    """
+    with memoryview(data) as view, view.cast("B") as raw:
+        yield raw, off + len(raw) if off < 0 else off
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -27,15 +60,41 @@ class JAUSoundIdTable:
         :param lookup_file_path: the file path containing the known sound names.
         :raises FileNotFoundError: when the lookup file cannot be found.
         """
-        self._lookup_ = dict()
+        self._lookup_, self._reverse_ = self._read_lookup_(lookup_file_path)
+
+    @staticmethod
+    def _read_lookup_(lookup_file_path) -> tuple:
+        """
+        Parses the lookup file and returns its name-to-ID and ID-to-name mappings.
+
+        :param lookup_file_path: the file path containing the known sound names.
+        :return: the forward and reverse lookup dictionaries.
+        :raises FileNotFoundError: when the lookup file cannot be found.
+        """
+        lookup = dict()
 
         if os.path.exists(lookup_file_path):
-            for field in open(lookup_file_path, "r", encoding="latin1").readlines():
-                sound_name, sound_id_str = field.strip("\r\n").split(",")
-                self._lookup_[sound_name] = int(sound_id_str)
+            # Latin-1 maps bytes one to one, so decoding the whole file at once is cheaper than text-mode reading
+            with open(lookup_file_path, "rb") as f:
+                text = f.read().decode("latin1")
+
+            for field in text.split("\n"):
+                field = field.rstrip("\r")
+
+                if field:
+                    sound_name, sound_id_str = field.split(",", 1)
+                    lookup[sound_name] = int(sound_id_str)
         else:
             raise FileNotFoundError(f"Lookup names file \"{lookup_file_path}\" cannot be found!")
 
+        # Inverse mapping of sound IDs to names, the first name wins if an ID is listed more than once
+        reverse = dict()
+
+        for sound_name, sound_id in lookup.items():
+            reverse.setdefault(sound_id, sound_name)
+
+        return lookup, reverse
+
     def find_name(self, sound_id: int) -> str:
         """
         Retrieves the proper sound label name for the given sound ID if it exists. Otherwise, a KeyError will be raised.
@@ -44,10 +103,7 @@ class JAUSoundIdTable:
         :return: the sound label name if it exists.
         :raises KeyError: when no sound label name could be found.
         """
-        for name, index in self._lookup_.items():
-            if index == sound_id:
-                return name
-        raise KeyError
+        return self._reverse_[sound_id]
 
     def find_id(self, sound_name: str) -> int:
         """
@@ -59,8 +115,25 @@ class JAUSoundIdTable:
         return self._lookup_[sound_name]
 
 
+@functools.lru_cache(maxsize=None)
+def _read_builtin_lookup_(lookup_file_path) -> tuple:
+    """
+    Parses one of the lookup files that ship with this package. The result is cached since these files never change, so
+    the game-specific tables are parsed only once. As all instances share the mappings, they are returned read-only.
+
+    :param lookup_file_path: the file path containing the known sound names.
+    :return: read-only views of the forward and reverse lookup dictionaries.
+    """
+    lookup, reverse = JAUSoundIdTable._read_lookup_(lookup_file_path)
+    return types.MappingProxyType(lookup), types.MappingProxyType(reverse)
+
+
 class SuperMarioGalaxy1SoundTable(JAUSoundIdTable):
-    """A sound lookup table implementation for Super Mario Galaxy."""
+    """
+    A sound lookup table implementation for Super Mario Galaxy. All instances share the same read-only table, which is
+    parsed only once.
+    """
+    _read_lookup_ = staticmethod(_read_builtin_lookup_)
 
     def __init__(self):
         """Constructs a new sound lookup table using the known names from Super Mario Galaxy."""
@@ -68,7 +141,11 @@ class SuperMarioGalaxy1SoundTable(JAUSoundIdTable):
 
 
 class SuperMarioGalaxy2SoundTable(JAUSoundIdTable):
-    """A sound lookup table implementation for Super Mario Galaxy 2."""
+    """
+    A sound lookup table implementation for Super Mario Galaxy 2. All instances share the same read-only table, which
+    is parsed only once.
+    """
+    _read_lookup_ = staticmethod(_read_builtin_lookup_)
 
     def __init__(self):
         """Constructs a new sound lookup table using the known names from Super Mario Galaxy 2."""
@@ -81,9 +158,11 @@ class SuperMarioGalaxy2SoundTable(JAUSoundIdTable):
 class JAUSoundAnimationSound:
     """An individual sound entry of a sound animation that specifies how a sound is played."""
 
-    # Structures for parsing and packing
-    __STRUCT_BE__ = struct.Struct(">I3fI6B6x")  # Big-endian
-    __STRUCT_LE__ = struct.Struct("<I3fI6B6x")  # Little-endian
+    # Fields in the order in which they are stored and serialized
+    __slots__ = (
+        "sound", "start_frame", "unk8", "pitch", "flags", "volume", "pitch_factor", "unk16", "pan", "volume_factor",
+        "unk19"
+    )
 
     def __init__(self):
         """Creates a new sound animation entry with the default values and no specific sound label."""
@@ -103,37 +182,8 @@ class JAUSoundAnimationSound:
         """Implements "repr(`self`)"."""
         return self.sound
 
-    def _unpack_(self, data, off: int, is_big_endian: bool, lookup: JAUSoundIdTable):
-        """
-        Unpacks the sound's information from the specified buffer.
-
-        :param data: the buffer.
-        :param off: the offset into the buffer.
-        :param is_big_endian: the endianness of the data.
-        """
-        strct = self.__STRUCT_BE__ if is_big_endian else self.__STRUCT_LE__
-        sound_id, self.start_frame, self.unk8, self.pitch, self.flags, self.volume, self.pitch_factor, self.unk16,\
-        self.pan, self.volume_factor, self.unk19 = strct.unpack_from(data, off)
-
-        self.sound = lookup.find_name(sound_id)
-
-    def _pack_(self, data, off: int, is_big_endian: bool, lookup: JAUSoundIdTable):
-        """
-        Packs the sound's information into the specified buffer.
-
-        :param data: the buffer.
-        :param off: the offset into the buffer.
-        :param is_big_endian: the endianness of the data.
-        """
-        strct = self.__STRUCT_BE__ if is_big_endian else self.__STRUCT_LE__
-        strct.pack_into(data, off, lookup.find_id(self.sound), self.start_frame, self.unk8, self.pitch, self.flags,
-                        self.volume, self.pitch_factor, self.unk16, self.pan, self.volume_factor, self.unk19)
-
 
 class JAUSoundAnimation(list):
-    __STRUCT_BE__ = struct.Struct(">H2B4x")
-    __STRUCT_LE__ = struct.Struct("<H2B4x")
-
     def __init__(self, lookup: JAUSoundIdTable):
         super().__init__()
         self._lookup_ = lookup
@@ -141,33 +191,85 @@ class JAUSoundAnimation(list):
         self.unk3 = 0
 
     def _unpack_(self, data, off: int, is_big_endian: bool):
-        strct = self.__STRUCT_BE__ if is_big_endian else self.__STRUCT_LE__
-        num_entries, self.unk2, self.unk3 = strct.unpack_from(data, off)
+        if is_big_endian:
+            hdr, ent = _HDR_BE, _ENTRY_BE
+        else:
+            hdr, ent = _HDR_LE, _ENTRY_LE
+
+        # Slicing and decoding the header fields by hand with int.from_bytes is slower than this precompiled struct
+        num_entries, self.unk2, self.unk3 = hdr.unpack_from(data, off)
         off += 8
 
-        for _ in range(num_entries):
-            sound = JAUSoundAnimationSound()
-            sound._unpack_(data, off, is_big_endian, self._lookup_)
-            self.append(sound)
-            off += 32
+        # Decode all sound entries in one go
+        size = num_entries * 32
+
+        with _byte_view_(data, off) as (raw, off), raw[off:off + size] as entries:
+            if len(entries) != size:
+                raise struct.error(f"Expected {num_entries} sound entries, but buffer is too small")
+
+            # Use the compiled decoder if the optional extension is built
+            if _bas_fast is not None:
+                self.extend(_bas_fast.decode_entries(entries, 0, num_entries, self._lookup_._reverse_,
+                                                     is_big_endian, JAUSoundAnimationSound))
+                return
+
+            # Bind everything the loop needs to locals to avoid repeated attribute and global lookups. Appending is not
+            # slower than index assignment into a preallocated list here, only the compiled decoder preallocates.
+            append = self.append
+            new_sound = JAUSoundAnimationSound
+            reverse = self._lookup_._reverse_
+
+            for entry in ent.iter_unpack(entries):
+                sound = new_sound()
+                sound_id, sound.start_frame, sound.unk8, sound.pitch, sound.flags, sound.volume,\
+                sound.pitch_factor, sound.unk16, sound.pan, sound.volume_factor, sound.unk19 = entry
+                sound.sound = reverse[sound_id]
+                append(sound)
+
+    def _pack_(self, data, off: int, is_big_endian: bool):
+        if is_big_endian:
+            hdr, ent = _HDR_BE, _ENTRY_BE
+        else:
+            hdr, ent = _HDR_LE, _ENTRY_LE
 
-    def makebin(self, is_big_endian: bool) -> bytes:
-        buffer = bytearray(8 + len(self) * 32)
-        strct = self.__STRUCT_BE__ if is_big_endian else self.__STRUCT_LE__
-        strct.pack_into(buffer, 0, len(self), self.unk2, self.unk3)
+        # Resolve all sound IDs first, unknown sound names raise a KeyError before anything is written
+        names = self._lookup_._lookup_
+        sound_ids = [names[sound.sound] for sound in self]
+
+        size = 8 + len(self) * 32
 
-        off_tmp = 8
+        # Check the size up front so that nothing is written if the buffer is too small
+        with _byte_view_(data, off) as (raw, off):
+            if off < 0 or len(raw) < off + size:
+                raise struct.error(f"pack_into requires a buffer of at least {off + size} bytes for packing {size} "
+                                   f"bytes at offset {off} (actual buffer size is {len(raw)})")
 
-        for sound in self:
-            sound._pack_(buffer, off_tmp, is_big_endian, self._lookup_)
+        hdr.pack_into(data, off, len(self), self.unk2, self.unk3)
+
+        # Pack all sound entries without going through per-entry method calls. Bulk encoding through a structured numpy
+        # array was tried as well, but gathering the fields from the sound objects made it slower than this loop.
+        pack_into = ent.pack_into
+        off_tmp = off + 8
+
+        for sound_id, sound in zip(sound_ids, self):
+            pack_into(data, off_tmp, sound_id, sound.start_frame, sound.unk8, sound.pitch, sound.flags,
+                      sound.volume, sound.pitch_factor, sound.unk16, sound.pan, sound.volume_factor, sound.unk19)
             off_tmp += 32
 
-        return bytes(buffer)
+    def makebin(self, is_big_endian: bool) -> bytearray:
+        buffer = bytearray(8 + len(self) * 32)
+        self._pack_(buffer, 0, is_big_endian)
+        return buffer
 
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Helper I/O functions
 # ----------------------------------------------------------------------------------------------------------------------
+# Fetches all fields of a JSON sound entry at once, in the same order as the sound's slots
+_JSON_KEYS = JAUSoundAnimationSound.__slots__
+_JSON_GET = operator.itemgetter(*_JSON_KEYS)
+
+
 def from_buffer(lookup: JAUSoundIdTable, buffer, offset: int, big_endian: bool = True) -> JAUSoundAnimation:
     soundanm = JAUSoundAnimation(lookup)
     soundanm._unpack_(buffer, offset, big_endian)
@@ -175,13 +277,28 @@ def from_buffer(lookup: JAUSoundIdTable, buffer, offset: int, big_endian: bool =
 
 
 def pack_buffer(soundanm: JAUSoundAnimation, big_endian: bool = True) -> bytes:
-    return soundanm.makebin(big_endian)
+    return bytes(soundanm.makebin(big_endian))
 
 
 def from_file(lookup: JAUSoundIdTable, file_path: str, big_endian: bool = True) -> JAUSoundAnimation:
     soundanm = JAUSoundAnimation(lookup)
+
     with open(file_path, "rb") as f:
-        soundanm._unpack_(f.read(), 0, big_endian)
+        # Empty files and streams such as pipes cannot be mapped, so those are read regularly
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            soundanm._unpack_(f.read(), 0, big_endian)
+            return soundanm
+
+        with mm:
+            # The data is read front to back exactly once, so hint the kernel to read ahead where supported
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+                mm.madvise(mmap.MADV_WILLNEED)
+
+            soundanm._unpack_(mm, 0, big_endian)
+
     return soundanm
 
 
@@ -190,19 +307,25 @@ def write_file(soundanm: JAUSoundAnimation, file_path: str, big_endian: bool = T
 
     with open(file_path, "wb") as f:
         f.write(buffer)
-        f.flush()
 
 
 def dump_json(soundanm: JAUSoundAnimation, file_path: str):
-    dumped = {
-        "unk2": soundanm.unk2,
-        "unk3": soundanm.unk3,
-        "sounds": [sound.__dict__ for sound in soundanm]
-    }
+    # Sound entries are encoded and written one at a time instead of building the entire document up front. The
+    # output matches what json.dump would produce for the whole document with an indentation of 4.
+    encoder = json.JSONEncoder(indent=4, ensure_ascii=False)
 
     with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(dumped, f, indent=4, ensure_ascii=False)
-        f.flush()
+        f.write(f"{{\n    \"unk2\": {encoder.encode(soundanm.unk2)},\n    \"unk3\": {encoder.encode(soundanm.unk3)},\n"
+                f"    \"sounds\": [")
+        separator = "\n        "
+
+        for sound in soundanm:
+            entry = {field: getattr(sound, field) for field in _JSON_KEYS}
+            f.write(separator)
+            f.write(encoder.encode(entry).replace("\n", "\n        "))
+            separator = ",\n        "
+
+        f.write("\n    ]\n}" if soundanm else "]\n}")
 
 
 def from_json(lookup: JAUSoundIdTable, file_path: str) -> JAUSoundAnimation:
@@ -215,16 +338,8 @@ def from_json(lookup: JAUSoundIdTable, file_path: str) -> JAUSoundAnimation:
 
     for sound_entry in jsondata["sounds"]:
         sound = JAUSoundAnimationSound()
-        sound.sound = sound_entry["start_frame"]
-        sound.unk8 = sound_entry["unk8"]
-        sound.pitch = sound_entry["pitch"]
-        sound.flags = sound_entry["flags"]
-        sound.volume = sound_entry["volume"]
-        sound.pitch_factor = sound_entry["pitch_factor"]
-        sound.unk16 = sound_entry["unk16"]
-        sound.pan = sound_entry["pan"]
-        sound.volume_factor = sound_entry["volume_factor"]
-        sound.unk19 = sound_entry["unk19"]
+        sound.sound, sound.start_frame, sound.unk8, sound.pitch, sound.flags, sound.volume, sound.pitch_factor,\
+        sound.unk16, sound.pan, sound.volume_factor, sound.unk19 = _JSON_GET(sound_entry)
         soundanm.append(sound)
 
     return soundanm
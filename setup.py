@@ -3,6 +3,18 @@ import setuptools
 with open("README.md", "r") as f:
     README = f.read()
 
+# The compiled sound entry codec is optional, pyjaubas falls back to pure Python if it cannot be built. Besides a missing
+# Cython, this also covers Cython versions that are too old to translate the module.
+try:
+    from Cython.Build import cythonize
+    EXT_MODULES = cythonize(
+        [setuptools.Extension("pyjaubas._bas_fast", ["pyjaubas/_bas_fast.pyx"], optional=True)],
+        language_level=3
+    )
+except Exception as e:
+    print(f"Building pyjaubas without the compiled sound entry codec: {e!r}")
+    EXT_MODULES = []
+
 setuptools.setup(
     name="pyjaubas",
     version="1.0.0",
@@ -13,6 +25,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     keywords=["nintendo", "jsystem", "jaudio", "bas", "modding"],
     packages=setuptools.find_packages(),
+    ext_modules=EXT_MODULES,
     package_data={"pyjaubas": ["lookup_*.txt"]},
     python_requires=">=3.6",
     license="gpl-3.0",
@@ -0,0 +1,146 @@
+"""
+Checks that the optional compiled sound entry decoder behaves exactly like the pure Python implementation. These tests
+are skipped if the extension is not built.
+"""
+
+import array
+import math
+import random
+import struct
+import unittest
+from unittest import mock
+
+from pyjaubas import bas
+
+
+SOUND_FIELDS = bas.JAUSoundAnimationSound.__slots__
+
+
+def _make_bas(sound_ids, is_big_endian: bool, floats=(1.5, -2.25, 0.75)) -> bytes:
+    endian = ">" if is_big_endian else "<"
+    data = struct.pack(endian + "H2B4x", len(sound_ids), 3, 5)
+
+    for i, sound_id in enumerate(sound_ids):
+        data += struct.pack(endian + "I3fI6B6x", sound_id, *floats, 0xFFFFFFFF - i, 255, i & 0xFF, 2, 64, 4, 0)
+
+    return data
+
+
+def _fields(sound) -> tuple:
+    # Floats are compared by their bit patterns so that NaN and signed zeros are checked as well
+    return tuple(struct.pack("<d", value) if isinstance(value, float) else value
+                 for value in (getattr(sound, field) for field in SOUND_FIELDS))
+
+
+@unittest.skipIf(bas._bas_fast is None, "compiled extension is not built")
+class CompiledDecoderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lookup = bas.SuperMarioGalaxy2SoundTable()
+        sound_ids = list(cls.lookup._reverse_)
+        random.seed(0)
+        cls.sound_ids = [random.choice(sound_ids) for _ in range(300)]
+
+    def _decode_both(self, buffer, offset: int = 0, is_big_endian: bool = True):
+        compiled = bas.from_buffer(self.lookup, buffer, offset, is_big_endian)
+
+        with mock.patch.object(bas, "_bas_fast", None):
+            pure = bas.from_buffer(self.lookup, buffer, offset, is_big_endian)
+
+        return compiled, pure
+
+    def _assert_same_error(self, buffer, offset: int = 0, is_big_endian: bool = True):
+        with self.assertRaises(Exception) as compiled:
+            bas.from_buffer(self.lookup, buffer, offset, is_big_endian)
+
+        with mock.patch.object(bas, "_bas_fast", None), self.assertRaises(Exception) as pure:
+            bas.from_buffer(self.lookup, buffer, offset, is_big_endian)
+
+        self.assertIs(type(compiled.exception), type(pure.exception))
+        self.assertEqual(str(compiled.exception), str(pure.exception))
+
+    def assertSameSounds(self, compiled, pure):
+        self.assertEqual(len(compiled), len(pure))
+        self.assertEqual((compiled.unk2, compiled.unk3), (pure.unk2, pure.unk3))
+
+        for sound_compiled, sound_pure in zip(compiled, pure):
+            self.assertIs(type(sound_compiled), bas.JAUSoundAnimationSound)
+            self.assertEqual(_fields(sound_compiled), _fields(sound_pure))
+
+    def test_round_trip(self):
+        for is_big_endian in (True, False):
+            with self.subTest(big_endian=is_big_endian):
+                data = _make_bas(self.sound_ids, is_big_endian)
+                compiled, pure = self._decode_both(data, 0, is_big_endian)
+                self.assertSameSounds(compiled, pure)
+                self.assertEqual(bas.pack_buffer(compiled, is_big_endian), data)
+
+    def test_special_floats(self):
+        for floats in ((math.inf, -math.inf, math.nan), (-0.0, 1e-45, 3.4028234663852886e38)):
+            for is_big_endian in (True, False):
+                with self.subTest(floats=floats, big_endian=is_big_endian):
+                    data = _make_bas(self.sound_ids[:4], is_big_endian, floats)
+                    compiled, pure = self._decode_both(data, 0, is_big_endian)
+                    self.assertSameSounds(compiled, pure)
+                    self.assertEqual(bas.pack_buffer(compiled, is_big_endian), data)
+
+    def test_empty(self):
+        compiled, pure = self._decode_both(_make_bas([], True))
+        self.assertSameSounds(compiled, pure)
+
+    def test_offsets_and_buffer_formats(self):
+        data = _make_bas(self.sound_ids[:5], True)
+        padded = bytes(12) + data
+        cases = [
+            (padded, 12), (padded, -len(data)), (bytearray(data), 0), (array.array("I", data), 0),
+            (memoryview(data).cast("I"), 0)
+        ]
+
+        for buffer, offset in cases:
+            with self.subTest(buffer=type(buffer).__name__, offset=offset):
+                self.assertSameSounds(*self._decode_both(buffer, offset))
+
+    def test_short_buffer(self):
+        data = _make_bas(self.sound_ids[:3], True)
+
+        for size in (0, 4, 8, 40, len(data) - 1):
+            with self.subTest(size=size):
+                self._assert_same_error(data[:size])
+
+    def test_unknown_sound_id(self):
+        unknown = max(self.lookup._reverse_) + 1
+        self._assert_same_error(_make_bas(self.sound_ids[:3] + [unknown], True))
+
+    def test_out_of_range_values(self):
+        compiled, pure = self._decode_both(_make_bas(self.sound_ids[:3], True))
+        cases = [
+            ("volume", 256), ("volume", -1), ("volume", 1.0), ("flags", -1), ("flags", 2 ** 32),
+            ("pitch", 1e300), ("start_frame", 10 ** 400), ("start_frame", "x")
+        ]
+
+        for field, value in cases:
+            with self.subTest(field=field, value=value):
+                errors = []
+
+                for soundanm in (compiled, pure):
+                    setattr(soundanm[1], field, value)
+
+                    with self.assertRaises(Exception) as ctx:
+                        soundanm.makebin(True)
+
+                    errors.append((type(ctx.exception), str(ctx.exception)))
+                    setattr(soundanm[1], field, getattr(soundanm[0], field))
+
+                self.assertEqual(errors[0], errors[1])
+
+    def test_decode_entries_checks_buffer(self):
+        data = _make_bas(self.sound_ids[:2], True)
+
+        for off, num_entries in ((8, 3), (-8, 1), (8, -1), (len(data), 1)):
+            with self.subTest(off=off, num_entries=num_entries), self.assertRaises(ValueError):
+                bas._bas_fast.decode_entries(data, off, num_entries, self.lookup._reverse_, True,
+                                             bas.JAUSoundAnimationSound)
+
+
+if __name__ == "__main__":
+    unittest.main()